@@ -3,7 +3,7 @@
 import time
 from typing import Optional, List, Dict, Any
 from enum import Enum
-import random
+import numpy as np
 
 from core.pixel_analyzer import PixelAnalyzer
 from combat.skill_manager import SkillManager
@@ -46,6 +46,7 @@ class CombatManager:
             "unstuck_cooldown": 5.0
         }
         self.stuck_search_timer = 0
+        self._rng = np.random.default_rng()
 
         self.last_kill_time = 0 
         
@@ -93,7 +94,7 @@ class CombatManager:
             if self.state == CombatState.FIGHTING:
                     target_exists = game_state.get('target_exists', False)
                     target_hp = game_state.get('target_hp', 0)
-                    if not self.current_target or not target_exists or target_hp <= 0:
+                    if self.current_target is None or not target_exists or target_hp <= 0:
                         # El objetivo murió, ¡a lootear!
                         self._transition_to_looting(current_time)
                     else:
@@ -106,6 +107,9 @@ class CombatManager:
             else: # Estamos en IDLE o TARGETING
                 target_exists = game_state.get('target_exists', False)
                 target_name = game_state.get('target_name', '')
+                if target_exists and game_state.get('target_name_pending', False):
+                    # El OCR del nombre aún no ha terminado: esperar antes de decidir si el objetivo es válido
+                    return
                 is_valid_new_target = self._evaluate_and_acquire_target(target_exists, target_name)
                 if is_valid_new_target:
                     self.state = CombatState.FIGHTING
@@ -116,7 +120,7 @@ class CombatManager:
             self.logger.error(f"Error in combat loop: {e}")
 
     def _evaluate_and_acquire_target(self, target_exists: bool, target_name: str) -> bool:
-        if self.current_target and not target_exists:
+        if self.current_target is not None and not target_exists:
             self.logger.info(f"Target '{self.current_target}' defeated or lost.")
             self.combat_stats['targets_lost'] += 1
             self.current_target = None
@@ -195,16 +199,23 @@ class CombatManager:
 
         try:
             window_rect = self.window_manager.target_window.rect
-            center_x = (window_rect[0] + window_rect[2]) // 2
-            center_y = (window_rect[1] + window_rect[3]) // 2
+            center = np.array([(window_rect[0] + window_rect[2]) // 2, (window_rect[1] + window_rect[3]) // 2])
             
-            for i in range(2):
-                radius = 100 
-                rand_x = center_x + random.randint(-radius, radius)
-                rand_y = center_y + random.randint(-radius, radius)
-                self.logger.debug(f"Unstuck click #{i+1} at ({rand_x}, {rand_y})")
-                self.input_controller.click_at(rand_x, rand_y, 'left')
-                time.sleep(random.uniform(0.2, 0.4))
+            # Todos los clics de una vez: centro + dispersión aleatoria, limitados al interior de la ventana
+            radius = 100
+            clicks = center + self._rng.integers(-radius, radius + 1, size=(2, 2))
+            np.clip(clicks, (window_rect[0] + 20, window_rect[1] + 20),
+                    (window_rect[2] - 20, window_rect[3] - 20), out=clicks)
+            
+            # Y el calendario completo: instante absoluto en que termina la pausa tras cada clic
+            deadlines = (time.perf_counter() + np.cumsum(self._rng.uniform(0.2, 0.4, size=len(clicks)))).tolist()
+            
+            coords = clicks.tolist()
+            click_at = self.input_controller.click_at
+            for (rand_x, rand_y), deadline in zip(coords, deadlines):
+                click_at(rand_x, rand_y, 'left')
+                time.sleep(max(0.0, deadline - time.perf_counter()))
+            self.logger.debug("Unstuck (%s) %d clicks: %s", reason, len(coords), coords)
         except Exception as e:
             self.logger.error(f"Simple unstuck movement failed: {e}")
 
@@ -278,24 +289,26 @@ class CombatManager:
 
     def _handle_looting(self, current_time: float):
         """Lógica que se ejecuta mientras se está en el estado LOOTING."""
-        time_in_state = current_time - self.looting_state["start_time"]
+        loot = self.looting_state
+        time_in_state = current_time - loot["start_time"]
 
         # 1. Si el tiempo total de looteo ha pasado, volvemos a buscar enemigos.
-        if time_in_state > self.looting_state["duration"]:
+        if time_in_state > loot["duration"]:
             self.logger.info("Looting phase finished. Resuming search.")
             self.state = CombatState.TARGETING
             return
 
         # 2. Esperar el delay inicial antes de hacer el primer intento.
-        if time_in_state < self.looting_state["initial_delay"]:
+        initial_delay = loot["initial_delay"]
+        if time_in_state < initial_delay:
             return # Aún no es hora de lootear
 
         # 3. Hacer los intentos de looteo
-        attempts_made = self.looting_state.get("_attempts_made", 0)
-        if attempts_made < self.looting_state["loot_attempts"]:
+        attempts_made = loot.get("_attempts_made", 0)
+        if attempts_made < loot["loot_attempts"]:
             # Calculamos si ya es hora del siguiente intento
-            next_attempt_time = self.looting_state["initial_delay"] + (attempts_made * self.looting_state["attempt_interval"])
+            next_attempt_time = initial_delay + (attempts_made * loot["attempt_interval"])
             if time_in_state >= next_attempt_time:
                 self.logger.debug(f"Looting attempt #{attempts_made + 1}")
-                self.input_controller.send_key(self.looting_state["loot_key"])
-                self.looting_state["_attempts_made"] = attempts_made + 1
\ No newline at end of file
+                self.input_controller.send_key(loot["loot_key"])
+                loot["_attempts_made"] = attempts_made + 1
\ No newline at end of file
@@ -127,221 +127,6 @@ class SkillRotation:
             'all_skills': self.skills.copy()
         }
 
-# ALSO FIX the set_active_rotation method to ensure proper reset:
-def set_active_rotation(self, rotation_name: Optional[str]) -> None:
-    """FIXED: Set the active rotation with proper reset"""
-    if rotation_name and rotation_name not in self.rotations:
-        raise SkillError(f"Rotation '{rotation_name}' not found")
-    
-    # If switching rotations, reset the new one
-    if rotation_name and rotation_name != self.active_rotation:
-        self.rotations[rotation_name].reset()
-        print(f"DEBUG: Reset rotation '{rotation_name}' when setting as active")
-    
-    self.active_rotation = rotation_name
-    
-    if rotation_name:
-        rotation = self.rotations[rotation_name]
-        print(f"DEBUG: Active rotation set to '{rotation_name}' - Skills: {rotation.skills}, Starting at index: {rotation.current_index}")
-    else:
-        print("DEBUG: Active rotation cleared")
-
-    """ENHANCED: Get the next skill to use based on rotation and priorities"""
-    try:
-        # If we have an active rotation, use it
-        if self.active_rotation and self.active_rotation in self.rotations:
-            rotation = self.rotations[self.active_rotation]
-            
-            if hasattr(self, 'logger'):
-                self.logger.debug(f"Using rotation '{self.active_rotation}' - Index: {rotation.current_index}/{len(rotation.skills)}")
-            
-            if rotation.enabled and rotation.skills:
-                next_skill = rotation.get_next_skill()
-                
-                if hasattr(self, 'logger'):
-                    # Calculate what step we're on (after the skill was used)
-                    step = rotation.current_index
-                    total = len(rotation.skills)
-                    self.logger.debug(f"Rotation returned skill: {next_skill} [Next index will be: {step}/{total}]")
-                
-                # Check if the skill from rotation can be used
-                if next_skill and self.can_use_skill(next_skill):
-                    return next_skill
-                else:
-                    if hasattr(self, 'logger'):
-                        self.logger.debug(f"Rotation skill '{next_skill}' not available, falling back to priority")
-        
-        # Fall back to priority-based selection
-        return self._get_priority_skill()
-        
-    except Exception as e:
-        if hasattr(self, 'logger'):
-            self.logger.error(f"Error in get_next_skill: {e}")
-        return None
-class SkillRotation:
-    """FIXED: Defines a sequence of skills to execute with proper indexing"""
-    
-    def __init__(self, name: str, skills: List[str], repeat: bool = True):
-        self.name = name
-        self.skills = skills  # List of skill names
-        self.repeat = repeat
-        self.current_index = 0  # Start at 0
-        self.enabled = True
-        self.skills_used = 0  # Track total skills used for debugging
-    
-    def get_next_skill(self) -> Optional[str]:
-        """FIXED: Get the next skill in the rotation"""
-        if not self.enabled or not self.skills:
-            return None
-        
-        # Get current skill BEFORE advancing
-        skill_name = self.skills[self.current_index]
-        
-        # Debug info
-        print(f"DEBUG Rotation '{self.name}': Index {self.current_index} -> Skill '{skill_name}' (Skills: {self.skills})")
-        
-        # Advance to next skill AFTER getting current
-        self._advance_index()
-        
-        # Increment usage counter
-        self.skills_used += 1
-        
-        return skill_name
-    
-    def _advance_index(self) -> None:
-        """FIXED: Advance to next skill in rotation"""
-        self.current_index += 1
-        
-        # If we've reached the end of the rotation
-        if self.current_index >= len(self.skills):
-            if self.repeat:
-                self.current_index = 0  # Reset to beginning
-                print(f"DEBUG Rotation '{self.name}': Completed cycle, resetting to index 0")
-            else:
-                self.enabled = False
-                self.current_index = len(self.skills) - 1  # Stay at last skill
-                print(f"DEBUG Rotation '{self.name}': Non-repeating rotation completed")
-    
-    def reset(self) -> None:
-        """Reset rotation to beginning"""
-        self.current_index = 0
-        self.enabled = True
-        self.skills_used = 0
-        print(f"DEBUG Rotation '{self.name}': Reset to index 0")
-    
-    def get_current_skill(self) -> Optional[str]:
-        """Get the current skill without advancing"""
-        if not self.enabled or not self.skills:
-            return None
-        return self.skills[self.current_index]
-    
-    def get_status(self) -> Dict[str, Any]:
-        """Get rotation status for debugging"""
-        next_index = (self.current_index + 1) % len(self.skills) if self.skills else 0
-        
-        return {
-            'name': self.name,
-            'current_index': self.current_index,
-            'total_skills': len(self.skills),
-            'current_skill': self.skills[self.current_index] if self.skills else None,
-            'next_skill': self.skills[next_index] if self.skills else None,
-            'enabled': self.enabled,
-            'repeat': self.repeat,
-            'skills_used': self.skills_used,
-            'all_skills': self.skills.copy()
-        }
-
-    """FIXED: Defines a sequence of skills to execute with proper indexing"""
-    
-    def __init__(self, name: str, skills: List[str], repeat: bool = True):
-        self.name = name
-        self.skills = skills  # List of skill names
-        self.repeat = repeat
-        self.current_index = 0  # Start at 0
-        self.enabled = True
-        self.skills_used = 0  # Track total skills used for debugging
-    
-    def get_next_skill(self) -> Optional[str]:
-        """FIXED: Get the next skill in the rotation"""
-        if not self.enabled or not self.skills:
-            return None
-        
-        # Get current skill BEFORE advancing
-        skill_name = self.skills[self.current_index]
-        
-        # Debug info
-        print(f"DEBUG Rotation '{self.name}': Index {self.current_index} -> Skill '{skill_name}' (Skills: {self.skills})")
-        
-        # Advance to next skill AFTER getting current
-        self._advance_index()
-        
-        # Increment usage counter
-        self.skills_used += 1
-        
-        return skill_name
-    
-    def _advance_index(self) -> None:
-        """FIXED: Advance to next skill in rotation"""
-        self.current_index += 1
-        
-        # If we've reached the end of the rotation
-        if self.current_index >= len(self.skills):
-            if self.repeat:
-                self.current_index = 0  # Reset to beginning
-                print(f"DEBUG Rotation '{self.name}': Completed cycle, resetting to index 0")
-            else:
-                self.enabled = False
-                self.current_index = len(self.skills) - 1  # Stay at last skill
-                print(f"DEBUG Rotation '{self.name}': Non-repeating rotation completed")
-    
-    def reset(self) -> None:
-        """Reset rotation to beginning"""
-        self.current_index = 0
-        self.enabled = True
-        self.skills_used = 0
-        print(f"DEBUG Rotation '{self.name}': Reset to index 0")
-    
-    def get_current_skill(self) -> Optional[str]:
-        """Get the current skill without advancing"""
-        if not self.enabled or not self.skills:
-            return None
-        return self.skills[self.current_index]
-    
-    def get_status(self) -> Dict[str, Any]:
-        """Get rotation status for debugging"""
-        next_index = (self.current_index + 1) % len(self.skills) if self.skills else 0
-        
-        return {
-            'name': self.name,
-            'current_index': self.current_index,
-            'total_skills': len(self.skills),
-            'current_skill': self.skills[self.current_index] if self.skills else None,
-            'next_skill': self.skills[next_index] if self.skills else None,
-            'enabled': self.enabled,
-            'repeat': self.repeat,
-            'skills_used': self.skills_used,
-            'all_skills': self.skills.copy()
-        }
-
-# ALSO FIX the set_active_rotation method to ensure proper reset:
-def set_active_rotation(self, rotation_name: Optional[str]) -> None:
-    """FIXED: Set the active rotation with proper reset"""
-    if rotation_name and rotation_name not in self.rotations:
-        raise SkillError(f"Rotation '{rotation_name}' not found")
-    
-    # If switching rotations, reset the new one
-    if rotation_name and rotation_name != self.active_rotation:
-        self.rotations[rotation_name].reset()
-        print(f"DEBUG: Reset rotation '{rotation_name}' when setting as active")
-    
-    self.active_rotation = rotation_name
-    
-    if rotation_name:
-        rotation = self.rotations[rotation_name]
-        print(f"DEBUG: Active rotation set to '{rotation_name}' - Skills: {rotation.skills}, Starting at index: {rotation.current_index}")
-    else:
-        print("DEBUG: Active rotation cleared")
-
 class SkillManager:
     """Advanced skill management system"""
     
@@ -756,7 +541,7 @@ class SkillManager:
             self.logger.info(f"Set active rotation from import: {active_rotation}")
         elif self.rotations:
             # If no active rotation specified but we have rotations, set the first one
-            first_rotation = list(self.rotations.keys())[0]
+            first_rotation = next(iter(self.rotations))
             self.set_active_rotation(first_rotation)
             self.logger.info(f"Auto-set first available rotation: {first_rotation}")
         
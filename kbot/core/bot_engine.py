@@ -186,7 +186,7 @@ class BotEngine(QObject):
                 self.skill_manager.set_active_rotation(skill_config['active_rotation'])
                 self.logger.info(f"Set active rotation from config: {skill_config['active_rotation']}")
             elif self.skill_manager.rotations:
-                first_rotation = list(self.skill_manager.rotations.keys())[0]
+                first_rotation = next(iter(self.skill_manager.rotations))
                 self.skill_manager.set_active_rotation(first_rotation)
                 self.logger.info(f"Auto-set active rotation: {first_rotation}")
         except Exception as e:
@@ -256,9 +256,11 @@ class BotEngine(QObject):
             self.skill_manager.update_game_state({
                 'hp': vitals['hp'], 'mp': vitals['mp'], 'target_exists': vitals['target_exists'],
                 'target_hp': vitals['target_health'], 'target_name': vitals.get('target_name', ''),
+                'target_name_pending': vitals.get('target_name_pending', False),
                 'in_combat': vitals['target_exists'] and vitals['target_health'] > 0})
             detected_name = vitals.get('target_name', '')
-            if detected_name != self.current_target:
+            # Con el nombre aún pendiente de OCR no se sabe si el objetivo cambió
+            if detected_name != self.current_target and not vitals.get('target_name_pending', False):
                 if (not self.current_target and detected_name) or (self.current_target and not detected_name) or (self.current_target and detected_name and not self._is_likely_ocr_noise(detected_name, self.current_target)):
                     old_target = self.current_target
                     self.current_target = detected_name
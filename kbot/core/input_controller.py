@@ -1,10 +1,11 @@
 # kbot/core/input_controller.py
 
 import time
+import ctypes
 import win32api
 import win32con
 import win32gui
-from typing import Optional, Dict
+from typing import Optional, Dict, Set, Sequence, Tuple
 from utils.exceptions import InputError
 from utils.logger import BotLogger
 from core.window_manager import WindowManager
@@ -43,12 +44,38 @@ class InputController:
             'failed_inputs': 0
         }
 
+        # Virtual-key codes currently held down by hold_key, released on emergency_stop.
+        self._held_keys: Set[int] = set()
+
+        # winmm para subir la resolución del temporizador solo mientras duran las esperas entre pulsaciones
+        try:
+            self._winmm = ctypes.windll.winmm
+        except Exception as e:
+            self._winmm = None
+            self.logger.debug(f"Could not load winmm, using default timer resolution: {e}")
+
     def _get_target_hwnd(self) -> Optional[int]:
         """Helper method to safely get the target window handle (HWND)."""
         if self.window_manager and self.window_manager.target_window:
             return self.window_manager.target_window.hwnd
         return None
 
+    def _sleep(self, seconds: float) -> None:
+        """
+        time.sleep con el temporizador de Windows a 1 ms, para no despertar hasta ~15 ms tarde.
+        La resolución se restaura al terminar: mantenerla subida cuesta energía a todo el sistema.
+        """
+        if seconds <= 0:
+            return
+        if self._winmm is None:
+            time.sleep(seconds)
+            return
+        self._winmm.timeBeginPeriod(1)
+        try:
+            time.sleep(seconds)
+        finally:
+            self._winmm.timeEndPeriod(1)
+
     def send_key(self, key: str) -> bool:
         """Sends a realistic key press (down and up) directly to the target window."""
         hwnd = self._get_target_hwnd()
@@ -80,12 +107,12 @@ class InputController:
 
             # Usamos PostMessage para no bloquear el bot. Si esto falla, el siguiente paso sería probar SendMessage.
             win32api.PostMessage(hwnd, win32con.WM_KEYDOWN, vk_code, lParam_down)
-            time.sleep(0.05)
+            self._sleep(0.05)
             win32api.PostMessage(hwnd, win32con.WM_KEYUP, vk_code, lParam_up)
 
             self.input_stats['total_inputs'] += 1
             self.input_stats['successful_inputs'] += 1
-            self.logger.debug(f"Sent key '{key}' to window 0x{hwnd:X} with realistic lParam.")
+            self.logger.debug("Sent key '%s' to window 0x%X with realistic lParam.", key, hwnd)
             return True
         except Exception as e:
             self.input_stats['failed_inputs'] += 1
@@ -108,18 +135,62 @@ class InputController:
             lParam_up = lParam_down | (1 << 30) | (1 << 31)
 
             win32api.PostMessage(hwnd, win32con.WM_KEYDOWN, vk_code, lParam_down)
-            time.sleep(duration)
+            self._held_keys.add(vk_code)
+            self._sleep(duration)
             win32api.PostMessage(hwnd, win32con.WM_KEYUP, vk_code, lParam_up)
+            self._held_keys.discard(vk_code)
             
             self.input_stats['total_inputs'] += 1
             self.input_stats['successful_inputs'] += 1
-            self.logger.debug(f"Held key '{key}' for {duration:.2f}s on window 0x{hwnd:X}")
+            self.logger.debug("Held key '%s' for %.2fs on window 0x%X", key, duration, hwnd)
             return True
         except Exception as e:
             self.input_stats['failed_inputs'] += 1
             self.logger.error(f"Failed to hold key '{key}': {e}")
             return False
 
+    def hold_key_sequence(self, sequence: Sequence[Tuple[str, float]], gap: float = 0.1) -> bool:
+        """
+        Holds each (key, duration) pair in order, pausing `gap` seconds after each one.
+        All waits are scheduled against a single perf_counter deadline so sleep jitter
+        does not accumulate across the steps.
+        """
+        hwnd = self._get_target_hwnd()
+        if not hwnd: return False
+
+        try:
+            vk_codes = [self.VK_CODE[key.lower()] for key, _ in sequence]
+        except KeyError as e:
+            self.logger.error(f"Key {e} is not defined in the Virtual-Key Code map.")
+            self.input_stats['failed_inputs'] += 1
+            return False
+
+        try:
+            deadline = time.perf_counter()
+            for vk_code, (_, duration) in zip(vk_codes, sequence):
+                scan_code = win32api.MapVirtualKey(vk_code, 0)
+                lParam_down = 1 | (scan_code << 16)
+                lParam_up = lParam_down | (1 << 30) | (1 << 31)
+
+                win32api.PostMessage(hwnd, win32con.WM_KEYDOWN, vk_code, lParam_down)
+                self._held_keys.add(vk_code)
+                deadline += duration
+                self._sleep(deadline - time.perf_counter())
+                win32api.PostMessage(hwnd, win32con.WM_KEYUP, vk_code, lParam_up)
+                self._held_keys.discard(vk_code)
+
+                deadline += gap
+                self._sleep(deadline - time.perf_counter())
+
+            self.input_stats['total_inputs'] += len(sequence)
+            self.input_stats['successful_inputs'] += len(sequence)
+            self.logger.debug("Held key sequence %s on window 0x%X", sequence, hwnd)
+            return True
+        except Exception as e:
+            self.input_stats['failed_inputs'] += 1
+            self.logger.error(f"Failed to hold key sequence {sequence}: {e}")
+            return False
+
     def click_at(self, x: int, y: int, button: str = 'left') -> bool:
         """Sends a click to specific screen coordinates within the target window."""
         hwnd = self._get_target_hwnd()
@@ -141,12 +212,12 @@ class InputController:
                 wparam = win32con.MK_RBUTTON
             
             win32api.PostMessage(hwnd, down_msg, wparam, lParam)
-            time.sleep(0.05)
+            self._sleep(0.05)
             win32api.PostMessage(hwnd, up_msg, 0, lParam)
             
             self.input_stats['total_inputs'] += 1
             self.input_stats['successful_inputs'] += 1
-            self.logger.debug(f"Sent {button} click at screen ({x}, {y}) to window 0x{hwnd:X}")
+            self.logger.debug("Sent %s click at screen (%d, %d) to window 0x%X", button, x, y, hwnd)
             return True
         except Exception as e:
             self.input_stats['failed_inputs'] += 1
@@ -169,5 +240,16 @@ class InputController:
         self.input_stats = { 'total_inputs': 0, 'successful_inputs': 0, 'failed_inputs': 0 }
     
     def emergency_stop(self) -> None:
-        """Logs an emergency stop event."""
+        """Releases every key still held down by hold_key and logs the event."""
+        hwnd = self._get_target_hwnd()
+        if hwnd:
+            # Copia: hold_key puede añadir o quitar teclas del conjunto mientras se recorre
+            for vk_code in tuple(self._held_keys):
+                try:
+                    scan_code = win32api.MapVirtualKey(vk_code, 0)
+                    lParam_up = 1 | (scan_code << 16) | (1 << 30) | (1 << 31)
+                    win32api.PostMessage(hwnd, win32con.WM_KEYUP, vk_code, lParam_up)
+                except Exception as e:
+                    self.logger.error(f"Failed to release key 0x{vk_code:X} during emergency stop: {e}")
+        self._held_keys.clear()
         self.logger.info("InputController emergency stop called.")
\ No newline at end of file
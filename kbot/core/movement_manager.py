@@ -1,14 +1,30 @@
 # core/movement_manager.py
 import time
-import random
+import math
+import numpy as np
 from typing import Tuple, List, Optional
 from core.input_controller import InputController
 from core.window_manager import WindowManager
 from utils.logger import BotLogger
 
+def _clamp(value: int, low: int, high: int) -> int:
+    """Clamp value into [low, high] without the builtin max/min calls"""
+    return low if value < low else (high if value > high else value)
+
 class MovementManager:
     """Handles intelligent movement and pathfinding"""
     
+    # Different turn patterns followed by walking, as (key, duration) steps
+    DIRECTIONAL_PATTERNS = (
+        (('a', 0.5), ('w', 2.0)),  # Turn left, walk
+        (('d', 0.5), ('w', 2.0)),  # Turn right, walk
+        (('a', 1.0), ('w', 1.5)),  # Turn left more, walk
+        (('d', 1.0), ('w', 1.5)),  # Turn right more, walk
+        (('a', 0.3), ('w', 1.0), ('d', 0.3), ('w', 1.0)),  # Turn left, walk, turn right, walk
+        (('d', 0.3), ('w', 1.0), ('a', 0.3), ('w', 1.0)),  # Turn right, walk, turn left, walk
+        (('s', 1.5),),  # Just walk backwards (if S works for backward)
+    )
+    
     def __init__(self, input_controller: InputController, window_manager: WindowManager, logger: BotLogger):
         self.input_controller = input_controller
         self.window_manager = window_manager
@@ -22,12 +38,35 @@ class MovementManager:
             "directional_keys"
         ]
         
+        # Strategy dispatch table
+        self._strategies = {
+            "click_movement": self._click_movement,
+            "random_walk": self._random_walk,
+            "circle_movement": self._circle_movement,
+            "directional_keys": self._directional_keys
+        }
+        
+        # Anti-stuck strategies, in the order they are tried
+        self._anti_stuck_order = (
+            self._click_movement,    # Try clicking first (most reliable)
+            self._directional_keys,  # Try key combinations
+            self._random_walk,       # Random movement
+            self._circle_movement    # Circular pattern
+        )
+        
         # Movement state
         self.last_movement_time = 0
         self.current_pattern = "click_movement"
         self.stuck_detection_time = 0
         self.last_position_check = 0
         
+        # Per-instance PCG64 generator for all movement randomness
+        self._rng = np.random.default_rng()
+        
+        # Window center, recomputed only when the target window rect changes
+        self._rect_cache: Optional[Tuple[int, int, int, int]] = None
+        self._window_center: Tuple[int, int] = (0, 0)
+        
         # Configuration
         self.movement_config = {
             'max_stuck_time': 5.0,  # Seconds before considering stuck
@@ -35,6 +74,7 @@ class MovementManager:
             'click_radius': 100,  # Pixels around center for click movement
             'directional_duration': 2.0  # Seconds for directional movement
         }
+        self._apply_movement_config()
     
     def execute_movement_strategy(self, strategy: str = None) -> bool:
         """Execute a specific movement strategy"""
@@ -42,24 +82,13 @@ class MovementManager:
             strategy = self.current_pattern
         
         try:
-            current_time = time.time()
+            current_time = time.monotonic()
             
             # Prevent too frequent movements
             if current_time - self.last_movement_time < 1.0:
                 return False
             
-            success = False
-            
-            if strategy == "click_movement":
-                success = self._click_movement()
-            elif strategy == "random_walk":
-                success = self._random_walk()
-            elif strategy == "circle_movement":
-                success = self._circle_movement()
-            elif strategy == "directional_keys":
-                success = self._directional_keys()
-            else:
-                success = self._random_walk()  # Fallback
+            success = self._strategies.get(strategy, self._random_walk)()  # Random walk as fallback
             
             if success:
                 self.last_movement_time = current_time
@@ -73,118 +102,91 @@ class MovementManager:
     
     def _click_movement(self) -> bool:
         """Move by clicking on random positions around the character"""
-        try:
-            if not self.window_manager.target_window:
-                return False
-            
-            # Get window center
-            window_rect = self.window_manager.target_window.rect
-            center_x = (window_rect[0] + window_rect[2]) // 2
-            center_y = (window_rect[1] + window_rect[3]) // 2
-            
-            # Generate random click position around center
-            radius = self.movement_config['click_radius']
-            angle = random.uniform(0, 2 * 3.14159)  # Random angle
-            distance = random.uniform(30, radius)  # Random distance
-            
-            click_x = center_x + int(distance * random.uniform(-1, 1))
-            click_y = center_y + int(distance * random.uniform(-1, 1))
-            
-            # Ensure click is within window bounds
-            click_x = max(window_rect[0] + 50, min(window_rect[2] - 50, click_x))
-            click_y = max(window_rect[1] + 50, min(window_rect[3] - 50, click_y))
-            
-            # Click to move
-            success = self.input_controller.click_at(click_x, click_y, 'left')
-            
-            if success:
-                self.logger.debug(f"Click movement to ({click_x}, {click_y})")
-                # Wait a bit for movement to start
-                time.sleep(0.5)
-            
-            return success
-            
-        except Exception as e:
-            self.logger.error(f"Click movement failed: {e}")
+        if not self.window_manager.target_window:
             return False
+        
+        # Get window center
+        window_rect = self.window_manager.target_window.rect
+        left, top, right, bottom = window_rect
+        center_x, center_y = self._get_window_center(window_rect)
+        
+        # Generate random click position around center
+        radius = self._click_radius
+        angle = self._rng.uniform(0, 2 * math.pi)  # Random angle
+        distance = math.sqrt(self._rng.uniform(30 ** 2, radius ** 2))  # Uniform over the ring 30..radius
+        
+        click_x = center_x + int(distance * math.cos(angle))
+        click_y = center_y + int(distance * math.sin(angle))
+        
+        # Ensure click is within window bounds
+        margin = 50
+        click_x = _clamp(click_x, left + margin, right - margin)
+        click_y = _clamp(click_y, top + margin, bottom - margin)
+        
+        # Click to move
+        success = self.input_controller.click_at(click_x, click_y, 'left')
+        
+        if success:
+            self.logger.debug("Click movement to (%d, %d)", click_x, click_y)
+            # Wait a bit for movement to start
+            time.sleep(0.5)
+        
+        return success
+    
+    def _get_window_center(self, window_rect: Tuple[int, int, int, int]) -> Tuple[int, int]:
+        """Get the center of the window, reusing the cached value while the rect is unchanged"""
+        if window_rect != self._rect_cache:
+            self._rect_cache = window_rect
+            self._window_center = ((window_rect[0] + window_rect[2]) // 2,
+                                   (window_rect[1] + window_rect[3]) // 2)
+        return self._window_center
     
     def _random_walk(self) -> bool:
         """Random directional movement - turn then walk"""
-        try:
-            # First turn to a random direction
-            turn_direction = random.choice(['a', 'd'])  # Only turn left or right
-            turn_duration = random.uniform(0.3, 1.0)  # Short turn
-            
-            self.logger.debug(f"Random walk: turning {turn_direction} for {turn_duration:.1f}s")
-            self.input_controller.hold_key(turn_direction, turn_duration)
-            
-            # Small pause between turn and walk
-            time.sleep(0.2)
-            
-            # Then walk forward
-            walk_duration = random.uniform(1.5, 3.0)
-            self.logger.debug(f"Random walk: walking forward for {walk_duration:.1f}s")
-            return self.input_controller.hold_key('w', walk_duration)
-            
-        except Exception as e:
-            self.logger.error(f"Random walk failed: {e}")
-            return False
+        # First turn to a random direction
+        turn_direction = 'ad'[self._rng.integers(2)]  # Only turn left or right
+        turn_duration = self._rng.uniform(0.3, 1.0)  # Short turn
+        
+        self.logger.debug("Random walk: turning %s for %.1fs", turn_direction, turn_duration)
+        self.input_controller.hold_key(turn_direction, turn_duration)
+        
+        # Small pause between turn and walk
+        time.sleep(0.2)
+        
+        # Then walk forward
+        walk_duration = self._rng.uniform(1.5, 3.0)
+        self.logger.debug("Random walk: walking forward for %.1fs", walk_duration)
+        return self.input_controller.hold_key('w', walk_duration)
     
     def _circle_movement(self) -> bool:
         """Move in a circular pattern - turn and walk repeatedly"""
-        try:
-            # Sequence: turn right, walk, turn right, walk (creates circle)
-            movements = [
-                ('d', 0.4, 'turn'),    # Turn right
-                ('w', 1.0, 'walk'),    # Walk forward
-                ('d', 0.4, 'turn'),    # Turn right again
-                ('w', 1.0, 'walk'),    # Walk forward
-                ('d', 0.4, 'turn'),    # Turn right again
-                ('w', 1.0, 'walk'),    # Walk forward
-            ]
-            
-            for key, duration, action_type in movements:
-                self.logger.debug(f"Circle movement: {action_type} {key} for {duration:.1f}s")
-                if not self.input_controller.hold_key(key, duration):
-                    return False
-                time.sleep(0.1)  # Small pause between movements
-            
-            self.logger.debug("Executed circle movement")
-            return True
-            
-        except Exception as e:
-            self.logger.error(f"Circle movement failed: {e}")
+        # Sequence: turn right, walk, turn right, walk (creates circle)
+        movements = [
+            ('d', 0.4),    # Turn right
+            ('w', 1.0),    # Walk forward
+            ('d', 0.4),    # Turn right again
+            ('w', 1.0),    # Walk forward
+            ('d', 0.4),    # Turn right again
+            ('w', 1.0),    # Walk forward
+        ]
+        
+        # One scheduled sequence, with a small pause between movements
+        if not self.input_controller.hold_key_sequence(movements, gap=0.1):
             return False
+        
+        self.logger.debug("Executed circle movement")
+        return True
     
     def _directional_keys(self) -> bool:
         """Try different directional combinations - turn then walk"""
-        try:
-            # Different turn patterns followed by walking
-            patterns = [
-                [('a', 0.5), ('w', 2.0)],  # Turn left, walk
-                [('d', 0.5), ('w', 2.0)],  # Turn right, walk
-                [('a', 1.0), ('w', 1.5)],  # Turn left more, walk
-                [('d', 1.0), ('w', 1.5)],  # Turn right more, walk
-                [('a', 0.3), ('w', 1.0), ('d', 0.3), ('w', 1.0)],  # Turn left, walk, turn right, walk
-                [('d', 0.3), ('w', 1.0), ('a', 0.3), ('w', 1.0)],  # Turn right, walk, turn left, walk
-                [('s', 1.5)],  # Just walk backwards (if S works for backward)
-            ]
-            
-            pattern = random.choice(patterns)
-            
-            for key, duration in pattern:
-                action = "walking" if key == 'w' else ("backing" if key == 's' else f"turning {key}")
-                self.logger.debug(f"Directional movement: {action} for {duration:.1f}s")
-                
-                if not self.input_controller.hold_key(key, duration):
-                    return False
-                time.sleep(0.1)  # Small pause between actions
-                
-            return True
-            
-        except Exception as e:
-            self.logger.error(f"Directional movement failed: {e}")
+        pattern = self.DIRECTIONAL_PATTERNS[self._rng.integers(len(self.DIRECTIONAL_PATTERNS))]
+        
+        # One scheduled sequence, with a small pause between actions
+        if not self.input_controller.hold_key_sequence(pattern, gap=0.1):
             return False
+        
+        self.logger.debug("Directional movement: %s", pattern)
+        return True
     
     def smart_approach_target(self, target_position: Optional[Tuple[int, int]] = None) -> bool:
         """Intelligently move towards target or unstuck"""
@@ -202,49 +204,44 @@ class MovementManager:
     
     def _click_near_target(self, target_pos: Tuple[int, int]) -> bool:
         """Click near target position to move closer"""
-        try:
-            target_x, target_y = target_pos
-            
-            # Click slightly offset from target to avoid clicking on target itself
-            offset_x = random.randint(-30, 30)
-            offset_y = random.randint(-30, 30)
-            
-            click_x = target_x + offset_x
-            click_y = target_y + offset_y
-            
-            # Ensure click is within window bounds
-            if self.window_manager.target_window:
-                window_rect = self.window_manager.target_window.rect
-                click_x = max(window_rect[0], min(window_rect[2], click_x))
-                click_y = max(window_rect[1], min(window_rect[3], click_y))
-            
-            success = self.input_controller.click_at(click_x, click_y, 'left')
-            
-            if success:
-                self.logger.debug(f"Clicked near target at ({click_x}, {click_y})")
-                time.sleep(0.5)
-            
-            return success
-            
-        except Exception as e:
-            self.logger.error(f"Click near target failed: {e}")
-            return False
+        target_x, target_y = target_pos
+        
+        # Click slightly offset from target to avoid clicking on target itself
+        offset_x, offset_y = self._rng.integers(-30, 31, size=2).tolist()
+        
+        click_x = target_x + offset_x
+        click_y = target_y + offset_y
+        
+        # Ensure click is within window bounds
+        if self.window_manager.target_window:
+            left, top, right, bottom = self.window_manager.target_window.rect
+            click_x = _clamp(click_x, left, right)
+            click_y = _clamp(click_y, top, bottom)
+        
+        success = self.input_controller.click_at(click_x, click_y, 'left')
+        
+        if success:
+            self.logger.debug("Clicked near target at (%d, %d)", click_x, click_y)
+            time.sleep(0.5)
+        
+        return success
     
     def execute_anti_stuck_movement(self) -> bool:
         """Execute movement specifically designed to get unstuck"""
         try:
             self.logger.info("Executing anti-stuck movement")
             
-            # Try multiple strategies in sequence
-            strategies = [
-                "click_movement",   # Try clicking first (most reliable)
-                "directional_keys", # Try key combinations
-                "random_walk",      # Random movement
-                "circle_movement"   # Circular pattern
-            ]
-            
-            for strategy in strategies:
-                if self.execute_movement_strategy(strategy):
+            # Try each strategy directly, skipping the rate limit of execute_movement_strategy
+            for strategy in self._anti_stuck_order:
+                try:
+                    success = strategy()
+                except Exception as e:
+                    self.logger.error(f"Anti-stuck strategy {strategy.__name__} failed: {e}")
+                    continue
+                
+                if success:
+                    self.last_movement_time = time.monotonic()
+                    self.logger.info(f"Executed anti-stuck strategy: {strategy.__name__}")
                     time.sleep(1.0)  # Wait to see if we got unstuck
                     return True
             
@@ -257,23 +254,24 @@ class MovementManager:
     def detect_stuck_situation(self) -> bool:
         """Detect if the character might be stuck"""
         # This is a simplified version - you could enhance with position tracking
-        current_time = time.time()
-        
         # If we haven't moved in a while, consider it stuck
-        if current_time - self.last_movement_time > self.movement_config['max_stuck_time']:
-            return True
-        
-        return False
+        return time.monotonic() - self.last_movement_time > self._max_stuck_time
     
     def set_movement_config(self, config: dict) -> None:
         """Update movement configuration"""
         self.movement_config.update(config)
+        self._apply_movement_config()
         self.logger.info(f"Movement config updated: {config}")
     
+    def _apply_movement_config(self) -> None:
+        """Mirror the config values read on hot paths into plain attributes"""
+        self._max_stuck_time = self.movement_config['max_stuck_time']
+        self._click_radius = self.movement_config['click_radius']
+    
     def get_movement_stats(self) -> dict:
         """Get movement statistics"""
         return {
             'last_movement_time': self.last_movement_time,
             'current_pattern': self.current_pattern,
-            'time_since_last_movement': time.time() - self.last_movement_time
+            'time_since_last_movement': time.monotonic() - self.last_movement_time
         }
\ No newline at end of file
@@ -1,13 +1,21 @@
 # kbot/core/pixel_analyzer.py
 
+import ctypes
+import io
 import numpy as np
+import os
 import re
+import subprocess
+import threading
 import time
+from collections import OrderedDict
+from ctypes import wintypes
+from concurrent.futures import Future, ThreadPoolExecutor
 import win32gui
 import win32ui
 import win32con
-from typing import Dict, Tuple, Optional
-from PIL import Image, ImageDraw, ImageOps, ImageFilter, ImageFont
+from typing import Dict, Tuple, Optional, Union
+from PIL import Image, ImageDraw, ImageOps, ImageFont
 import pytesseract
 from utils.exceptions import AnalysisError
 from utils.logger import BotLogger
@@ -15,6 +23,115 @@ from utils.logger import BotLogger
 # Configura la ruta a Tesseract si no está en el PATH del sistema
 pytesseract.pytesseract.tesseract_cmd = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
 
+# Los recortes de OCR son diminutos: el pool de hilos de OpenMP de Tesseract solo añade coste.
+# Debe fijarse antes de cargar tesserocr; tesseract.exe (pytesseract) lo hereda del entorno.
+os.environ.setdefault('OMP_THREAD_LIMIT', '1')
+
+# Tabla de umbral para el texto del nombre: Image.point con una LUT evita llamar a Python por píxel.
+# El texto claro queda en negro sobre blanco, la polaridad que Tesseract espera (sin pasada invertida)
+_NAME_THRESHOLD_LUT = [0 if p > 200 else 255 for p in range(256)]
+
+# Funciones win32 que se llaman en cada frame, resueltas una sola vez al importar
+_GetForegroundWindow = win32gui.GetForegroundWindow
+_GetClientRect = win32gui.GetClientRect
+_GetWindowRect = win32gui.GetWindowRect
+_SRCCOPY = win32con.SRCCOPY
+
+# El mapa de bits de captura es una DIB section: BitBlt escribe directamente en memoria que NumPy ve sin copias
+class _BITMAPINFOHEADER(ctypes.Structure):
+    _fields_ = [
+        ('biSize', wintypes.DWORD), ('biWidth', wintypes.LONG), ('biHeight', wintypes.LONG),
+        ('biPlanes', wintypes.WORD), ('biBitCount', wintypes.WORD), ('biCompression', wintypes.DWORD),
+        ('biSizeImage', wintypes.DWORD), ('biXPelsPerMeter', wintypes.LONG), ('biYPelsPerMeter', wintypes.LONG),
+        ('biClrUsed', wintypes.DWORD), ('biClrImportant', wintypes.DWORD),
+    ]
+
+class _BITMAPINFO(ctypes.Structure):
+    _fields_ = [('bmiHeader', _BITMAPINFOHEADER), ('bmiColors', wintypes.DWORD * 3)]
+
+_CreateDIBSection = ctypes.windll.gdi32.CreateDIBSection
+_CreateDIBSection.argtypes = [wintypes.HDC, ctypes.POINTER(_BITMAPINFO), wintypes.UINT,
+                              ctypes.POINTER(ctypes.c_void_p), wintypes.HANDLE, wintypes.DWORD]
+_CreateDIBSection.restype = wintypes.HBITMAP
+_GdiFlush = ctypes.windll.gdi32.GdiFlush
+_DIB_RGB_COLORS = 0
+
+# Todo lo que no sea letra se descarta del nombre reconocido
+_NON_ALPHA_RE = re.compile(r'[^a-zA-Z]')
+
+# Caracteres válidos en nombres de objetivo (segundo intento de OCR)
+_NAME_WHITELIST = 'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz'
+
+# tesserocr es opcional: mantiene el motor de Tesseract cargado en proceso en lugar de lanzar tesseract.exe por llamada
+try:
+    from tesserocr import PyTessBaseAPI, PSM, OEM
+except ImportError:
+    PyTessBaseAPI = None
+
+# DXGI Desktop Duplication es opcional: captura más rápida cuando la ventana está visible.
+# Se prefiere dxcam (mantenido); D3DShot queda como alternativa.
+try:
+    import dxcam
+except ImportError:
+    dxcam = None
+try:
+    import d3dshot
+except ImportError:
+    d3dshot = None
+
+# Numba es opcional: si está instalado, las barras se miden con un kernel compilado de una sola pasada
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+if njit is not None:
+    @njit(cache=True, fastmath=True)
+    def _bar_fill_kernel(pixels, mode, hi_min, lo1_max, lo2_max, bright):
+        """Media del relleno por fila (0-100) o -1.0 si ninguna fila cuenta. mode 0 = hp/target, 1 = mp."""
+        height, width = pixels.shape[0], pixels.shape[1]
+        total = 0.0
+        rows = 0
+        for y in range(height):
+            # Se recorre desde la derecha: el primer píxel lleno es el extremo de la barra (x=0 no cuenta)
+            for x in range(width - 1, 0, -1):
+                r = pixels[y, x, 0]
+                g = pixels[y, x, 1]
+                b = pixels[y, x, 2]
+                if r > bright and g > bright and b > bright:
+                    continue
+                if mode == 0:
+                    filled = r > hi_min and g < lo1_max and b < lo2_max
+                else:
+                    filled = b > hi_min and r < lo1_max and g < lo2_max
+                if filled:
+                    total += (x + 1) / width * 100.0
+                    rows += 1
+                    break
+        return total / rows if rows else -1.0
+
+    @njit(cache=True)
+    def _bars_fill_kernel(frame, rects, params, bright, min_cols):
+        """Relleno medio de cada barra (filas de rects/params) sobre el mismo frame, en una sola entrada al JIT."""
+        out = np.empty(rects.shape[0])
+        for i in range(rects.shape[0]):
+            x1 = max(rects[i, 0], 0)
+            y1 = max(rects[i, 1], 0)
+            x2 = min(rects[i, 2], frame.shape[1])
+            # Todas las filas; columnas submuestreadas solo en barras anchas (ver PixelAnalyzer._bar_step_x)
+            step_x = max(1, (x2 - x1) // min_cols)
+            view = frame[y1:rects[i, 3], x1:x2:step_x]
+            out[i] = _bar_fill_kernel(view, params[i, 0], params[i, 1], params[i, 2], params[i, 3], bright)
+        return out
+
+    # Compila (o carga de la caché) al importar para que el primer frame no pague el JIT
+    _bar_fill_kernel(np.zeros((1, 1, 3), dtype=np.uint8), 0, 0, 0, 0, 0)
+    _bars_fill_kernel(np.zeros((1, 1, 3), dtype=np.uint8), np.zeros((1, 4), dtype=np.int64),
+                      np.zeros((1, 4), dtype=np.int64), 0, 1)
+else:
+    _bar_fill_kernel = None
+    _bars_fill_kernel = None
+
 class PixelAnalyzer:
     """
     Maneja la captura de pantalla y el análisis de píxeles para el juego, utilizando un método robusto
@@ -32,88 +149,324 @@ class PixelAnalyzer:
         # El HWND de la ventana objetivo es ahora la pieza central de información.
         self.target_hwnd: Optional[int] = None
         
+        # Objetos GDI de captura reutilizables, indexados por (hwnd, ancho, alto)
+        self._dc_cache: Dict[Tuple[int, int, int], tuple] = {}
+        
+        # Motores OCR persistentes (línea completa y palabra con lista blanca); None si se usa pytesseract
+        self._tess_line = None
+        self._tess_word = None
+        if PyTessBaseAPI is not None:
+            try:
+                kwargs = {}
+                tessdata = os.path.join(os.path.dirname(pytesseract.pytesseract.tesseract_cmd), 'tessdata')
+                if os.path.isdir(tessdata):
+                    kwargs['path'] = tessdata
+                # Solo LSTM: no se inicializa el motor legacy
+                self._tess_line = PyTessBaseAPI(psm=PSM.SINGLE_LINE, oem=OEM.LSTM_ONLY, **kwargs)
+                self._tess_word = PyTessBaseAPI(psm=PSM.SINGLE_WORD, oem=OEM.LSTM_ONLY, **kwargs)
+                self._tess_word.SetVariable('tessedit_char_whitelist', _NAME_WHITELIST)
+                # El recorte ya llega binarizado en negro sobre blanco: sin la pasada extra con la imagen invertida
+                for api in (self._tess_line, self._tess_word):
+                    api.SetVariable('tessedit_do_invert', '0')
+            except Exception as e:
+                self.logger.warning(f"tesserocr unavailable, using pytesseract: {e}")
+                self._end_tesserocr()
+        
+        # Buffer RGB reutilizado por capture_frame mientras no cambie el tamaño de la ventana
+        self._frame_buf: Optional[np.ndarray] = None
+        # Rectángulo que engloba las regiones de vitales y las regiones relativas a él, por configuración de regiones
+        self._roi_key: Optional[tuple] = None
+        self._roi_bbox: Optional[Tuple[int, int, int, int]] = None
+        self._roi_regions: Dict[str, Tuple[int, int, int, int]] = {}
+        
+        # Captura DXGI persistente: función grab(region=...) -> array RGB, o None si no hay backend disponible
+        self._dxgi_grab = self._create_dxgi_grabber()
+        # Último frame DXGI y su rectángulo en pantalla: dxcam devuelve None si la pantalla no cambió desde entonces
+        self._dxgi_last: Optional[np.ndarray] = None
+        self._dxgi_last_rect: Optional[Tuple[int, int, int, int]] = None
+        # Tras un fallo de DXGI (p. ej. ventana en otra salida o con coordenadas negativas) se usa BitBlt
+        # durante dxgi_retry_interval segundos; el fallo se registra una sola vez hasta que DXGI vuelva a funcionar
+        self.dxgi_retry_interval = 30.0
+        self._dxgi_retry_ts = 0.0
+        self._dxgi_failing = False
+        
+        # Caché LRU de OCR: huella perceptual del recorte del nombre -> nombre corregido
+        self._ocr_cache: OrderedDict = OrderedDict()
+        self._ocr_cache_size = 256
+        
+        # Reutilización del último nombre mientras la barra del objetivo no cambie (con refresco periódico).
+        # _last_target_name es None mientras el nombre del objetivo actual está pendiente de OCR
+        self._last_target_bar_hash: Optional[int] = None
+        self._last_target_name: Optional[str] = ""
+        self._name_key: Optional[bytes] = None
+        self._name_img: Optional[Image.Image] = None
+        self._last_ocr_ts = 0.0
+        self._ocr_refresh_interval = 2.0
+        # Altura aproximada (px) a la que se escala el recorte del nombre antes del OCR
+        self.ocr_target_height = 32
+        
+        # OCR en un único hilo de fondo; el lock serializa los motores Tesseract y la caché
+        self._ocr_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ocr")
+        self._ocr_future: Optional[Future] = None
+        # Huella del recorte que está reconociendo _ocr_future; su resultado solo vale si sigue siendo la actual
+        self._ocr_future_key: Optional[bytes] = None
+        self._ocr_lock = threading.Lock()
+        
         # Mapeos y umbrales de configuración.
         self.char_map = { 'J': 'Z', 'i': 'l', '1': 'l', '0': 'O', '5': 'S', '8': 'B', ' ': '' }
+        self._char_trans = str.maketrans(self.char_map)
         self.color_thresholds = {
             'hp': {'r_min': 150, 'g_max': 100, 'b_max': 100},
             'mp': {'b_min': 150, 'r_max': 100, 'g_max': 100},
             'bright_threshold': 200
         }
+        self._refresh_bar_params()
+        # Columnas mínimas a muestrear por barra: solo las barras más anchas se submuestrean, y el error
+        # de cuantización del porcentaje queda por debajo de 100 / bar_sample_min_cols puntos
+        self.bar_sample_min_cols = 100
 
     def set_target_window(self, hwnd: int):
         """
         Establece el handle (HWND) de la ventana que se va a analizar.
         Este método es el punto de entrada para configurar el analizador.
         """
+        if hwnd != self.target_hwnd:
+            self._release_dc_cache()
+            self._dxgi_last = None
+            self._dxgi_retry_ts = 0.0
         self.target_hwnd = hwnd
 
     def capture_screen(self) -> Image.Image:
         """
-        Captura el contenido de la ventana objetivo usando la API de win32,
-        lo que permite la captura incluso si la ventana está en segundo plano.
+        Captura el área cliente de la ventana objetivo. Si la ventana está en primer plano y DXGI
+        está disponible se usa Desktop Duplication; si no, la API de win32, que funciona en segundo plano.
+        """
+        # Envoltorio PIL para herramientas de depuración; el análisis por frame usa capture_frame directamente.
+        # fromarray copia, así que la imagen no se ve afectada cuando el buffer se reutiliza.
+        return Image.fromarray(self.capture_frame())
+
+    def _create_dxgi_grabber(self):
+        """Crea la interfaz de duplicación DXGI (dxcam o, si no, D3DShot) y devuelve su función de captura."""
+        try:
+            if dxcam is not None:
+                return dxcam.create(output_color="RGB").grab
+            if d3dshot is not None:
+                return d3dshot.create(capture_output="numpy").screenshot
+        except Exception as e:
+            self.logger.warning(f"DXGI capture unavailable, using win32 BitBlt: {e}")
+        return None
+
+    def _capture_dxgi(self, region: Optional[Tuple[int, int, int, int]] = None) -> Optional[np.ndarray]:
+        """
+        Captura vía DXGI el mismo rectángulo que copiaría BitBlt (o una subregión suya) como array RGB.
+        Si la pantalla no ha cambiado se devuelve el último frame del mismo rectángulo; None si no es posible.
+        """
+        try:
+            _, _, width, height = _GetClientRect(self.target_hwnd)
+            x1, y1, x2, y2 = self._clip_to_client(region, width, height)
+            if x2 <= x1 or y2 <= y1:
+                return None
+            # BitBlt copia desde el DC de la ventana (GetWindowDC): las coordenadas parten de su esquina, no del área cliente.
+            # Se lee en cada captura: un origen cacheado quedaría desfasado al mover la ventana
+            left, top = _GetWindowRect(self.target_hwnd)[:2]
+            rect = (left + x1, top + y1, left + x2, top + y2)
+            frame = self._dxgi_grab(region=rect)
+            self._dxgi_failing = False
+            if frame is not None:
+                self._dxgi_last, self._dxgi_last_rect = frame, rect
+            elif rect == self._dxgi_last_rect:
+                # Sin cambios en pantalla: se reutiliza el último frame en vez de alternar con BitBlt
+                frame = self._dxgi_last
+            return frame
+        except Exception as e:
+            self._dxgi_retry_ts = time.monotonic() + self.dxgi_retry_interval
+            if not self._dxgi_failing:
+                self._dxgi_failing = True
+                self.logger.warning("DXGI capture failed, using win32 BitBlt for %.0fs: %s", self.dxgi_retry_interval, e)
+            return None
+
+    @staticmethod
+    def _clip_to_client(region: Optional[Tuple[int, int, int, int]], width: int, height: int) -> Tuple[int, int, int, int]:
+        """Recorta una región (left, top, right, bottom) al tamaño del área cliente; None = área completa."""
+        if region is None:
+            return 0, 0, width, height
+        x1, y1, x2, y2 = region
+        return max(0, x1), max(0, y1), min(width, x2), min(height, y2)
+
+    def capture_frame(self, region: Optional[Tuple[int, int, int, int]] = None) -> np.ndarray:
+        """
+        Captura el área cliente como array RGB (alto, ancho, 3). El array es un buffer reutilizado:
+        el siguiente frame lo sobrescribe, así que quien necesite conservarlo debe copiarlo.
+        Con region (left, top, right, bottom, relativa a la esquina de la ventana como en BitBlt) solo se copia
+        ese rectángulo, recortado al tamaño del área cliente; el píxel [0, 0] del resultado corresponde a (left, top).
         """
         if not self.target_hwnd:
             raise AnalysisError("El handle (HWND) de la ventana objetivo no está configurado para PixelAnalyzer.")
 
+        src = None
+        if (self._dxgi_grab is not None and time.monotonic() >= self._dxgi_retry_ts
+                and _GetForegroundWindow() == self.target_hwnd):
+            src = self._capture_dxgi(region)
+        if src is None:
+            # Vista BGRX sobre el buffer DIB; el canal X se descarta y B/R se invierten al copiar
+            src = self._grab_win32_bits(region)[..., 2::-1]
+
+        if self._frame_buf is None or self._frame_buf.shape != src.shape:
+            self._frame_buf = np.empty(src.shape, dtype=np.uint8)
+        np.copyto(self._frame_buf, src)
+        return self._frame_buf
+
+    def _grab_win32_bits(self, region: Optional[Tuple[int, int, int, int]] = None) -> np.ndarray:
+        """
+        BitBlt del área cliente (o de una subregión suya) a la DIB section cacheada (funciona en segundo plano).
+        Devuelve una vista (alto, ancho, 4) BGRX sobre la memoria de la DIB, válida hasta la siguiente captura.
+        """
         try:
             # Obtener las dimensiones del área cliente de la ventana (sin bordes ni barra de título)
-            left, top, right, bottom = win32gui.GetClientRect(self.target_hwnd)
-            width = right - left
-            height = bottom - top
+            left, top, right, bottom = _GetClientRect(self.target_hwnd)
+            if right - left <= 0 or bottom - top <= 0:
+                raise AnalysisError(f"Dimensiones de ventana inválidas: {right - left}x{bottom - top}. ¿Está minimizada?")
 
+            # El coste de BitBlt es proporcional a los píxeles copiados: solo se copia la región pedida
+            x1, y1, x2, y2 = self._clip_to_client(region, right - left, bottom - top)
+            width = x2 - x1
+            height = y2 - y1
             if width <= 0 or height <= 0:
-                raise AnalysisError(f"Dimensiones de ventana inválidas: {width}x{height}. ¿Está minimizada?")
+                raise AnalysisError(f"La región {region} queda fuera del área cliente")
 
-            # Obtener el contexto de dispositivo (DC) de la ventana
-            hwndDC = win32gui.GetWindowDC(self.target_hwnd)
-            mfcDC = win32ui.CreateDCFromHandle(hwndDC)
-            saveDC = mfcDC.CreateCompatibleDC()
-
-            # Crear un mapa de bits en memoria para guardar la imagen
-            saveBitMap = win32ui.CreateBitmap()
-            saveBitMap.CreateCompatibleBitmap(mfcDC, width, height)
-            saveDC.SelectObject(saveBitMap)
+            # Los DC y el mapa de bits se reutilizan entre frames mientras no cambien la ventana ni su tamaño
+            key = (self.target_hwnd, width, height)
+            gdi = self._dc_cache.get(key)
+            if gdi is None:
+                self._release_dc_cache()
+                gdi = self._create_gdi_objects(width, height)
+                self._dc_cache[key] = gdi
+            _, mfcDC, saveDC, _, dib_view = gdi
 
             # Copiar los datos de píxeles de la ventana a nuestro mapa de bits en memoria.
             # Esta es la operación clave que funciona en segundo plano.
-            saveDC.BitBlt((0, 0), (width, height), mfcDC, (0, 0), win32con.SRCCOPY)
-
-            # Convertir el mapa de bits a un objeto de imagen de la librería Pillow (PIL)
-            bmpinfo = saveBitMap.GetInfo()
-            bmpstr = saveBitMap.GetBitmapBits(True)
-            im = Image.frombuffer('RGB', (bmpinfo['bmWidth'], bmpinfo['bmHeight']), bmpstr, 'raw', 'BGRX', 0, 1)
-
-            return im
+            saveDC.BitBlt((0, 0), (width, height), mfcDC, (x1, y1), _SRCCOPY)
+            # GDI puede diferir operaciones: vaciar la cola antes de leer la memoria de la DIB
+            _GdiFlush()
+            return dib_view
         except Exception as e:
+            # Si algo falla (p. ej. la ventana se cerró) se descartan los objetos para recrearlos en el próximo frame
+            self._release_dc_cache()
             raise AnalysisError(f"Fallo al capturar contenido de la ventana vía win32 API: {e}")
-        finally:
-            # Es crucial liberar todos los manejadores de Windows para evitar fugas de memoria.
-            if 'saveDC' in locals() and saveDC: saveDC.DeleteDC()
-            if 'mfcDC' in locals() and mfcDC: mfcDC.DeleteDC()
-            if 'hwndDC' in locals() and hwndDC: win32gui.ReleaseDC(self.target_hwnd, hwndDC)
-            if 'saveBitMap' in locals() and saveBitMap: win32gui.DeleteObject(saveBitMap.GetHandle())
-
-    def analyze_vitals(self, regions: Dict[str, Tuple[int, int, int, int]]):
-        """Obtiene el estado actual de HP, MP y objetivo usando el método de captura en segundo plano."""
+
+    def _create_gdi_objects(self, width: int, height: int) -> tuple:
+        """
+        Crea el DC de la ventana, el DC compatible y una DIB section de destino para un tamaño dado,
+        junto con una vista NumPy (alto, ancho, 4) BGRX sobre la memoria de la DIB.
+        """
+        hwndDC = win32gui.GetWindowDC(self.target_hwnd)
+        mfcDC = win32ui.CreateDCFromHandle(hwndDC)
+        saveDC = mfcDC.CreateCompatibleDC()
+
+        # DIB de 32 bits sin comprimir; altura negativa = filas de arriba abajo
+        bmi = _BITMAPINFO()
+        bmi.bmiHeader.biSize = ctypes.sizeof(_BITMAPINFOHEADER)
+        bmi.bmiHeader.biWidth = width
+        bmi.bmiHeader.biHeight = -height
+        bmi.bmiHeader.biPlanes = 1
+        bmi.bmiHeader.biBitCount = 32
+        bits = ctypes.c_void_p()
+        hbmp = _CreateDIBSection(saveDC.GetSafeHdc(), ctypes.byref(bmi), _DIB_RGB_COLORS, ctypes.byref(bits), None, 0)
+        if not hbmp or not bits.value:
+            saveDC.DeleteDC()
+            mfcDC.DeleteDC()
+            win32gui.ReleaseDC(self.target_hwnd, hwndDC)
+            raise AnalysisError(f"CreateDIBSection falló para {width}x{height}")
+        win32gui.SelectObject(saveDC.GetSafeHdc(), hbmp)
+
+        # La vista apunta a memoria propiedad de la DIB: deja de ser válida al liberar la caché
+        dib_view = np.ctypeslib.as_array((ctypes.c_uint8 * (width * height * 4)).from_address(bits.value)).reshape(height, width, 4)
+        return hwndDC, mfcDC, saveDC, hbmp, dib_view
+
+    def _release_dc_cache(self):
+        """Libera todos los manejadores GDI cacheados para evitar fugas."""
+        for (hwnd, _, _), (hwndDC, mfcDC, saveDC, hbmp, _) in self._dc_cache.items():
+            try:
+                saveDC.DeleteDC()
+                mfcDC.DeleteDC()
+                win32gui.ReleaseDC(hwnd, hwndDC)
+                win32gui.DeleteObject(hbmp)
+            except Exception:
+                pass
+        self._dc_cache.clear()
+
+    def _end_tesserocr(self):
+        """Cierra los motores tesserocr abiertos y vuelve al modo pytesseract."""
+        for api in (self._tess_line, self._tess_word):
+            if api is not None:
+                try:
+                    api.End()
+                except Exception:
+                    pass
+        self._tess_line = None
+        self._tess_word = None
+
+    def close(self):
+        """Libera los recursos de captura y OCR."""
+        self._release_dc_cache()
+        # Esperar al OCR en curso antes de cerrar los motores que está usando
+        self._ocr_executor.shutdown(wait=True)
+        self._end_tesserocr()
+
+    def __del__(self):
         try:
-            img = self.capture_screen()
-            
-            hp_pixels = self.get_region_pixels(img, regions['hp'])
-            mp_pixels = self.get_region_pixels(img, regions['mp'])
-            target_pixels = self.get_region_pixels(img, regions['target'])
+            self.close()
+        except Exception:
+            pass
+
+    def analyze_vitals(self, regions: Dict[str, Tuple[int, int, int, int]], frame: Optional[np.ndarray] = None):
+        """
+        Obtiene el estado actual de HP, MP y objetivo usando el método de captura en segundo plano.
+        Si se pasa un frame de capture_frame (p. ej. compartido con otros análisis del mismo tick), no se vuelve a capturar.
+        """
+        try:
+            # Un único buffer por frame (reutilizado entre frames); las barras son vistas sobre él, sin copias
+            if frame is None:
+                # Solo se captura el rectángulo que engloba las regiones, con las regiones desplazadas a su origen
+                bbox, regions = self._get_roi_regions(regions)
+                frame = self.capture_frame(bbox)
             
-            hp_percent = self.calculate_health_percentage(hp_pixels, 'hp')
-            mp_percent = self.calculate_health_percentage(mp_pixels, 'mp')
-            target_health = self.calculate_health_percentage(target_pixels, 'target')
+            hp_percent, mp_percent, target_health = self.analyze_bars(frame, regions['hp'], regions['mp'], regions['target'])
             target_exists = target_health > 5
 
-            target_name = ""
+            # El OCR corre en un hilo aparte: aquí solo se lanza y se devuelve el último nombre conocido.
+            # Mientras el nombre del objetivo actual no se conoce, target_name_pending es True y target_name ""
+            self._collect_ocr_result()
             if target_exists:
-                target_name = self.extract_target_name_from_image(img, regions['target_name'])
+                # Huella barata de la barra submuestreada: si no ha cambiado, el objetivo tampoco
+                target_pixels = self.get_region_pixels(frame, regions['target'])
+                bar_hash = hash(target_pixels[::4, ::4].tobytes())
+                now = time.monotonic()
+                if bar_hash != self._last_target_bar_hash:
+                    # Puede ser otro objetivo: el nombre anterior deja de valer hasta volver a reconocerlo
+                    self._last_target_bar_hash = bar_hash
+                    self._last_ocr_ts = now
+                    self._set_name_crop(frame, regions['target_name'], keep_name=False)
+                elif now - self._last_ocr_ts >= self._ocr_refresh_interval:
+                    self._last_ocr_ts = now
+                    self._set_name_crop(frame, regions['target_name'], keep_name=True)
+                if self._last_target_name is None and self._ocr_future is None:
+                    self._ocr_future = self._ocr_executor.submit(self._recognize_name, self._name_img, True, self._name_key)
+                    self._ocr_future_key = self._name_key
+                target_name = self._last_target_name
+            else:
+                # Sin objetivo se olvida el nombre (y cualquier OCR en curso) para no etiquetar al siguiente con él
+                self._ocr_future = None
+                self._last_target_bar_hash = None
+                self._last_target_name = ""
+                self._name_key = None
+                self._name_img = None
+                target_name = ""
 
             return {
                 'hp': hp_percent, 'mp': mp_percent, 'target_exists': target_exists,
-                'target_health': target_health, 'target_name': target_name,
+                'target_health': target_health, 'target_name': target_name or "",
+                'target_name_pending': target_name is None,
                 'timestamp': self._get_timestamp()
             }
         except Exception as e:
@@ -121,9 +474,51 @@ class PixelAnalyzer:
             self.logger.error(f"El análisis de vitales falló: {e}")
             return {
                 'hp': 100, 'mp': 100, 'target_exists': False, 
-                'target_health': 0, 'target_name': '', 'timestamp': self._get_timestamp()
+                'target_health': 0, 'target_name': '', 'target_name_pending': False,
+                'timestamp': self._get_timestamp()
             }
 
+    def _set_name_crop(self, frame: np.ndarray, name_region: Tuple[int, int, int, int], keep_name: bool) -> None:
+        """
+        Recorta el nombre del frame y calcula su huella. Si el recorte cambió, el nombre se toma de la caché
+        (coincidencia exacta) o queda pendiente (None) hasta que termine el OCR. Con keep_name se conserva
+        el nombre actual mientras la huella no cambie (salvo que esté vacío, p. ej. tras un fallo del OCR).
+        """
+        # El recorte se copia aquí: el buffer del frame se reutiliza en la siguiente captura
+        self._name_img = self._crop_name(frame, name_region)
+        key = self._dhash(self._name_img)
+        if keep_name and key == self._name_key and self._last_target_name:
+            return
+        self._name_key = key
+        self._last_target_name = self._cached_name(key)
+
+    def _cached_name(self, key: bytes) -> Optional[str]:
+        """Nombre en la caché de OCR para una huella, o None. No espera al hilo de OCR si está ocupado."""
+        if not self._ocr_lock.acquire(blocking=False):
+            return None
+        try:
+            name = self._ocr_cache.get(key)
+            if name is not None:
+                self._ocr_cache.move_to_end(key)
+            return name
+        finally:
+            self._ocr_lock.release()
+
+    def _get_roi_regions(self, regions: Dict[str, Tuple[int, int, int, int]]) -> Tuple[Tuple[int, int, int, int], Dict[str, Tuple[int, int, int, int]]]:
+        """
+        Devuelve el rectángulo que engloba las regiones de vitales y esas regiones relativas a su esquina.
+        Se recalcula solo cuando cambia la configuración de regiones.
+        """
+        names = ('hp', 'mp', 'target', 'target_name')
+        key = tuple(tuple(regions[name]) for name in names)
+        if key != self._roi_key:
+            left = max(0, min(r[0] for r in key))
+            top = max(0, min(r[1] for r in key))
+            self._roi_bbox = (left, top, max(r[2] for r in key), max(r[3] for r in key))
+            self._roi_regions = {name: (r[0] - left, r[1] - top, r[2] - left, r[3] - top) for name, r in zip(names, key)}
+            self._roi_key = key
+        return self._roi_bbox, self._roi_regions
+
     # --- MÉTODOS RESTAURADOS Y FUNCIONALES ---
 
     def create_debug_image(self, regions: Dict[str, Tuple[int, int, int, int]]) -> Image.Image:
@@ -133,16 +528,21 @@ class PixelAnalyzer:
             draw = ImageDraw.Draw(img)
             region_colors = {"hp": "red", "mp": "blue", "target": "green", "target_name": "yellow"}
             
+            # La fuente se carga una vez para todas las etiquetas, no una vez por región
+            try:
+                font = ImageFont.load_default()
+            except IOError: # Fallback si la fuente por defecto no se encuentra
+                font = None
+            
+            img_w, img_h = img.size
             for name, region in regions.items():
+                x1, y1, x2, y2 = region
+                # Regiones fuera de la captura no se dibujan
+                if x1 >= img_w or y1 >= img_h or x2 <= 0 or y2 <= 0:
+                    continue
                 color = region_colors.get(name, "white")
                 draw.rectangle(region, outline=color, width=2)
-                x1, y1, _, _ = region
-                label = f"{name.upper()}: {region}"
-                try:
-                    font = ImageFont.load_default()
-                    draw.text((x1, y1 - 15), label, fill=color, font=font)
-                except IOError: # Fallback si la fuente por defecto no se encuentra
-                    draw.text((x1, y1 - 15), label, fill=color)
+                draw.text((x1, y1 - 15), f"{name.upper()}: {region}", fill=color, font=font)
             return img
         except Exception as e:
             raise AnalysisError(f"Fallo al crear la imagen de depuración: {e}")
@@ -153,7 +553,7 @@ class PixelAnalyzer:
             img = self.capture_screen()
             name_img = img.crop(name_region)
             processed_img = self.preprocess_name_image(name_img)
-            extracted_name = self.extract_target_name_from_image(img, name_region)
+            extracted_name = self.extract_target_name_from_image(img, name_region, use_cache=False)
             return {
                 'original_image': name_img, 'processed_image': processed_img,
                 'extracted_name': extracted_name, 'region_coords': name_region,
@@ -164,63 +564,184 @@ class PixelAnalyzer:
             
     # --- MÉTODOS AUXILIARES (SIN CAMBIOS) ---
 
-    def get_region_pixels(self, img: Image.Image, region: Tuple[int, int, int, int]) -> np.ndarray:
+    def get_region_pixels(self, img: Union[Image.Image, np.ndarray], region: Tuple[int, int, int, int]) -> np.ndarray:
         try:
+            if isinstance(img, np.ndarray):
+                x1, y1, x2, y2 = region
+                return img[max(y1, 0):y2, max(x1, 0):x2]
             return np.array(img.crop(region))
         except Exception as e:
             raise AnalysisError(f"Fallo al extraer píxeles de la región {region}: {e}")
 
-    def extract_target_name_from_image(self, img: Image.Image, name_region: Tuple[int, int, int, int]) -> str:
+    def extract_target_name_from_image(self, img: Union[Image.Image, np.ndarray], name_region: Tuple[int, int, int, int],
+                                       use_cache: bool = True) -> str:
         try:
-            name_img = img.crop(name_region)
+            return self._recognize_name(self._crop_name(img, name_region), use_cache)
+        except Exception as e:
+            raise AnalysisError(f"La extracción de OCR desde la imagen falló: {e}")
+
+    def _crop_name(self, img: Union[Image.Image, np.ndarray], name_region: Tuple[int, int, int, int]) -> Image.Image:
+        """Recorta la región del nombre como imagen PIL independiente (copia, no vista del frame)."""
+        if isinstance(img, np.ndarray):
+            return Image.fromarray(np.ascontiguousarray(self.get_region_pixels(img, name_region)))
+        return img.crop(name_region)
+
+    def _recognize_name(self, name_img: Image.Image, use_cache: bool = True, key: Optional[bytes] = None) -> str:
+        """
+        Preprocesa y reconoce el nombre. Puede ejecutarse en el hilo de OCR: todo bajo _ocr_lock.
+        key es la huella del recorte si ya se calculó.
+        """
+        with self._ocr_lock:
+            # Solo coincidencias exactas: nombres que difieren en una o dos letras pueden dar huellas casi iguales
+            if not use_cache:
+                key = None
+            elif key is None:
+                key = self._dhash(name_img)
+            if key is not None and key in self._ocr_cache:
+                self._ocr_cache.move_to_end(key)
+                return self._ocr_cache[key]
+            
             processed_img = self.preprocess_name_image(name_img)
-            config = '--psm 7 --oem 3'
-            raw_name = pytesseract.image_to_string(processed_img, config=config).strip()
+            raw_name = self._ocr(processed_img, single_word=False)
             if len(raw_name) < 3:
-                config = '--psm 8 --oem 3 -c tessedit_char_whitelist=ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz'
-                raw_name = pytesseract.image_to_string(processed_img, config=config).strip()
-            return self.correct_ocr_mistakes(raw_name)
+                raw_name = self._ocr(processed_img, single_word=True)
+            name = self.correct_ocr_mistakes(raw_name)
+            
+            if key is not None:
+                self._ocr_cache[key] = name
+                if len(self._ocr_cache) > self._ocr_cache_size:
+                    self._ocr_cache.popitem(last=False)
+            return name
+
+    def _collect_ocr_result(self):
+        """Recoge el resultado del OCR en segundo plano si ya terminó."""
+        future = self._ocr_future
+        if future is None or not future.done():
+            return
+        self._ocr_future = None
+        try:
+            name = future.result()
         except Exception as e:
-            raise AnalysisError(f"La extracción de OCR desde la imagen falló: {e}")
+            self.logger.error(f"Target name OCR failed: {e}")
+            name = ""
+        # Un resultado de un recorte anterior (el objetivo cambió mientras se reconocía) se descarta
+        if self._ocr_future_key == self._name_key and self._last_target_name is None:
+            self._last_target_name = name
+
+    @staticmethod
+    def _dhash(img: Image.Image) -> bytes:
+        """Difference hash de 256 bits sobre una reducción en grises de 33x8 (el texto es ancho, no cuadrado)."""
+        arr = np.asarray(img.convert('L').resize((33, 8), Image.BILINEAR), dtype=np.int16)
+        return np.packbits(arr[:, 1:] > arr[:, :-1]).tobytes()
+
+    def _ocr(self, img: Image.Image, single_word: bool) -> str:
+        """Ejecuta OCR como línea (psm 7) o como palabra con lista blanca (psm 8)."""
+        api = self._tess_word if single_word else self._tess_line
+        if api is not None:
+            api.SetImage(img)
+            return api.GetUTF8Text().strip()
+        # Sin tesserocr: tesseract.exe por tuberías (PNG en memoria por stdin), sin ficheros temporales
+        args = [pytesseract.pytesseract.tesseract_cmd, 'stdin', 'stdout', '--oem', '1', '-c', 'tessedit_do_invert=0']
+        if single_word:
+            args += ['--psm', '8', '-c', f'tessedit_char_whitelist={_NAME_WHITELIST}']
+        else:
+            args += ['--psm', '7']
+        buf = io.BytesIO()
+        img.save(buf, format='PNG', compress_level=1)
+        result = subprocess.run(args, input=buf.getvalue(), capture_output=True, timeout=10,
+                                creationflags=getattr(subprocess, 'CREATE_NO_WINDOW', 0))
+        if result.returncode != 0:
+            raise AnalysisError(f"Tesseract terminó con código {result.returncode}: {result.stderr.decode(errors='ignore').strip()}")
+        return result.stdout.decode('utf-8', errors='ignore').strip()
+
+    def analyze_bars(self, frame: np.ndarray, hp_rect: Tuple[int, int, int, int], mp_rect: Tuple[int, int, int, int],
+                     target_rect: Tuple[int, int, int, int]) -> Tuple[int, int, int]:
+        """Porcentajes de hp, mp y objetivo sobre el mismo frame. Con Numba, en una sola llamada al kernel."""
+        # Se analizan todas las filas (en barras finas una fila de borde puede ser la única diferente del relleno);
+        # las columnas solo se submuestrean en barras anchas, con una vista sin copia
+        if _bars_fill_kernel is not None:
+            rects = np.array((hp_rect, mp_rect, target_rect), dtype=np.int64)
+            means = _bars_fill_kernel(frame, rects, self._bars_params, self._bright_threshold, self.bar_sample_min_cols)
+            return tuple(min(100, max(0, int(mean))) if mean >= 0 else 0 for mean in means)
+        hp_pixels = self.get_region_pixels(frame, hp_rect)
+        mp_pixels = self.get_region_pixels(frame, mp_rect)
+        hp_percent = self.calculate_health_percentage(hp_pixels[:, ::self._bar_step_x(hp_pixels)], 'hp')
+        mp_percent = self.calculate_health_percentage(mp_pixels[:, ::self._bar_step_x(mp_pixels)], 'mp')
+        
+        # Sin objetivo la barra no tiene ni un píxel rojo: una muestra muy dispersa lo descarta sin el análisis completo
+        target_pixels = self.get_region_pixels(frame, target_rect)
+        # Todas las filas (una franja de borde no debe ocultar el relleno en barras finas), una de cada 8 columnas
+        probe = target_pixels[:, ::8]
+        _, r_min, g_max, b_max = self._bar_params['target']
+        if probe.size == 0 or not ((probe[..., 0] > r_min) & (probe[..., 1] < g_max) & (probe[..., 2] < b_max)).any():
+            return hp_percent, mp_percent, 0
+        return hp_percent, mp_percent, self.calculate_health_percentage(target_pixels[:, ::self._bar_step_x(target_pixels)], 'target')
+
+    def _bar_step_x(self, pixels: np.ndarray) -> int:
+        """Paso de columnas para una barra: 1 salvo en barras de al menos 2 * bar_sample_min_cols columnas."""
+        return max(1, pixels.shape[1] // self.bar_sample_min_cols) if pixels.ndim == 3 else 1
 
     def calculate_health_percentage(self, pixels: np.ndarray, bar_type: str) -> int:
         if pixels.size == 0: return 0
         if len(pixels.shape) != 3 or pixels.shape[2] < 3: return 0
-        height, width, _ = pixels.shape
-        filled_widths = []
-        for y in range(height):
-            rightmost = 0
-            for x in range(width):
-                r, g, b = pixels[y, x][:3]
-                if (r > self.color_thresholds['bright_threshold'] and g > self.color_thresholds['bright_threshold'] and b > self.color_thresholds['bright_threshold']): continue
-                is_filled = False
-                if bar_type in ['hp', 'target']:
-                    thresholds = self.color_thresholds['hp']
-                    is_filled = (r > thresholds['r_min'] and g < thresholds['g_max'] and b < thresholds['b_max'])
-                elif bar_type == 'mp':
-                    thresholds = self.color_thresholds['mp']
-                    is_filled = (b > thresholds['b_min'] and r < thresholds['r_max'] and g < thresholds['g_max'])
-                if is_filled and x > rightmost: rightmost = x
-            if rightmost > 0: filled_widths.append((rightmost + 1) / width * 100)
-        if filled_widths: return min(100, max(0, int(sum(filled_widths) / len(filled_widths))))
+        params = self._bar_params.get(bar_type)
+        if params is None: return 0
+        mode, hi_min, lo1_max, lo2_max = params
+        bright = self._bright_threshold
+        
+        if _bar_fill_kernel is not None:
+            mean = _bar_fill_kernel(pixels, mode, hi_min, lo1_max, lo2_max, bright)
+            return min(100, max(0, int(mean))) if mean >= 0 else 0
+        
+        width = pixels.shape[1]
+        r, g, b = pixels[..., 0], pixels[..., 1], pixels[..., 2]
+        
+        # Máscara de píxeles "llenos" para toda la barra de una vez, descartando los casi blancos.
+        # hp/target: rojo alto, verde y azul bajos; mp: azul alto, rojo y verde bajos.
+        hi, lo1, lo2 = (r, g, b) if mode == 0 else (b, r, g)
+        filled = (hi > hi_min) & (lo1 < lo1_max) & (lo2 < lo2_max)
+        filled &= ~((r > bright) & (g > bright) & (b > bright))
+        
+        # Columna más a la derecha con relleno en cada fila (las filas sin relleno o solo en x=0 no cuentan)
+        rightmost = width - 1 - filled[:, ::-1].argmax(axis=1)
+        rightmost = rightmost[filled.any(axis=1) & (rightmost > 0)]
+        if rightmost.size:
+            return min(100, max(0, int(((rightmost + 1) / width * 100).mean())))
         return 0
 
     def preprocess_name_image(self, img: Image.Image) -> Image.Image:
         try:
             img = img.convert('L')
             img = ImageOps.autocontrast(img, cutoff=5)
-            img = img.point(lambda p: p > 200 and 255)
-            img = img.filter(ImageFilter.GaussianBlur(radius=0.5))
-            return img.resize((img.width * 2, img.height * 2), Image.LANCZOS)
+            # Escalar antes de binarizar: el bilineal suaviza los bordes y el umbral los deja nítidos (sin desenfoque).
+            # El factor lleva la altura a ~32 px (altura de línea con la que se entrenó Tesseract); si ya llega, no se escala
+            scale = max(1, int(round(self.ocr_target_height / max(1, img.height))))
+            if scale > 1:
+                img = img.resize((img.width * scale, img.height * scale), Image.BILINEAR)
+            return img.point(_NAME_THRESHOLD_LUT)
         except Exception as e:
             raise AnalysisError(f"Fallo al preprocesar la imagen: {e}")
 
     def correct_ocr_mistakes(self, text: str) -> str:
-        corrected = ''.join(self.char_map.get(char, char) for char in text)
-        return re.sub(r'[^a-zA-Z]', '', corrected).strip()
+        return _NON_ALPHA_RE.sub('', text.translate(self._char_trans)).strip()
 
     def set_color_thresholds(self, thresholds: Dict[str, Dict[str, int]]) -> None:
         self.color_thresholds.update(thresholds)
+        self._refresh_bar_params()
+
+    def _refresh_bar_params(self) -> None:
+        """Aplana los umbrales a tuplas de enteros (modo, canal alto mín., canal bajo 1 máx., canal bajo 2 máx.)."""
+        hp = self.color_thresholds['hp']
+        mp = self.color_thresholds['mp']
+        hp_params = (0, int(hp['r_min']), int(hp['g_max']), int(hp['b_max']))
+        self._bar_params = {
+            'hp': hp_params,
+            'target': hp_params,
+            'mp': (1, int(mp['b_min']), int(mp['r_max']), int(mp['g_max'])),
+        }
+        self._bright_threshold = int(self.color_thresholds['bright_threshold'])
+        # Mismos parámetros en filas hp, mp, objetivo para el kernel fusionado
+        self._bars_params = np.array([self._bar_params[name] for name in ('hp', 'mp', 'target')], dtype=np.int64)
 
     def get_color_thresholds(self) -> Dict[str, Dict[str, int]]:
         return self.color_thresholds.copy()
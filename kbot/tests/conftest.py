@@ -0,0 +1,6 @@
+# tests/conftest.py
+import os
+import sys
+
+# Los módulos del bot se importan como en main.py (utils, core, ...), con kbot/ en el path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
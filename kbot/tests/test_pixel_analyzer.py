@@ -0,0 +1,51 @@
+# tests/test_pixel_analyzer.py
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("win32gui")
+
+from core.pixel_analyzer import PixelAnalyzer
+
+BORDER = (40, 40, 40)
+RED = (200, 30, 30)
+BLUE = (30, 30, 200)
+
+
+@pytest.fixture
+def analyzer():
+    analyzer = PixelAnalyzer()
+    yield analyzer
+    analyzer.close()
+
+
+def _draw_bar(frame, rect, color, fill):
+    """Barra de 3 px de alto: fila de borde oscura arriba y abajo, relleno solo en la fila central."""
+    x1, y1, x2, y2 = rect
+    frame[y1:y2, x1:x2] = BORDER
+    filled = round((x2 - x1) * fill)
+    frame[y1 + 1, x1:x1 + filled] = color
+
+
+def test_thin_bordered_bars_are_read(analyzer):
+    frame = np.zeros((40, 500, 3), dtype=np.uint8)
+    hp_rect, mp_rect, target_rect = (10, 2, 70, 5), (10, 10, 70, 13), (10, 20, 70, 23)
+    _draw_bar(frame, hp_rect, RED, 0.5)
+    _draw_bar(frame, mp_rect, BLUE, 0.25)
+    _draw_bar(frame, target_rect, RED, 0.8)
+
+    hp, mp, target = analyzer.analyze_bars(frame, hp_rect, mp_rect, target_rect)
+
+    assert hp == 50
+    assert mp == 25
+    assert target == 80
+
+
+def test_wide_bar_error_below_one_point(analyzer):
+    frame = np.zeros((40, 500, 3), dtype=np.uint8)
+    hp_rect, mp_rect, target_rect = (10, 2, 460, 5), (10, 10, 70, 13), (10, 20, 70, 23)
+    _draw_bar(frame, hp_rect, RED, 0.37)
+
+    hp, _, target = analyzer.analyze_bars(frame, hp_rect, mp_rect, target_rect)
+
+    assert abs(hp - 37) <= 1
+    assert target == 0
@@ -36,30 +36,36 @@ class BotLogger(QObject):
             self.logger.addHandler(console_handler)
             self.logger.addHandler(file_handler)
     
-    def debug(self, message: str) -> None:
-        """Log debug message"""
-        self.logger.debug(message)
-        self._emit_ui_message("DEBUG", message)
+    def debug(self, message: str, *args) -> None:
+        """Log debug message (%-style args are formatted once, here, not at the call site)"""
+        self._log(logging.DEBUG, "DEBUG", message, args)
     
-    def info(self, message: str) -> None:
+    def info(self, message: str, *args) -> None:
         """Log info message"""
-        self.logger.info(message)
-        self._emit_ui_message("INFO", message)
+        self._log(logging.INFO, "INFO", message, args)
     
-    def warning(self, message: str) -> None:
+    def warning(self, message: str, *args) -> None:
         """Log warning message"""
-        self.logger.warning(message)
-        self._emit_ui_message("WARNING", message)
+        self._log(logging.WARNING, "WARNING", message, args)
     
-    def error(self, message: str) -> None:
+    def error(self, message: str, *args) -> None:
         """Log error message"""
-        self.logger.error(message)
-        self._emit_ui_message("ERROR", message)
+        self._log(logging.ERROR, "ERROR", message, args)
     
-    def critical(self, message: str) -> None:
+    def critical(self, message: str, *args) -> None:
         """Log critical message"""
-        self.logger.critical(message)
-        self._emit_ui_message("CRITICAL", message)
+        self._log(logging.CRITICAL, "CRITICAL", message, args)
+    
+    def _log(self, level: int, level_name: str, message: str, args: tuple) -> None:
+        """Format the message once and send it to both the logger and the UI"""
+        if args:
+            try:
+                message = message % args
+            except (TypeError, ValueError):
+                # Un formato mal escrito no debe romper el código que registra: se registra tal cual
+                message = f"{message} {args}"
+        self.logger.log(level, message)
+        self._emit_ui_message(level_name, message)
     
     def _emit_ui_message(self, level: str, message: str) -> None:
         """Emit signal for UI update"""